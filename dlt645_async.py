@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Asyncio DL/T 645-2007 Reader for DDSY5558 Meter
+Same framing as dlt645_read.py, but each transaction is awaited on the
+event loop (pyserial-asyncio-fast) instead of blocking on fixed sleeps
+"""
+
+import asyncio
+import sys
+import time
+
+import serial
+import serial_asyncio_fast
+
+from dlt645_read import DI_INFO, DLT645Protocol
+
+try:
+    # Optional faster event loop (libuv); the stdlib loop is used otherwise
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+def run(main):
+    """Run a coroutine on uvloop when installed, else on the stdlib loop"""
+    return uvloop.run(main) if uvloop is not None else asyncio.run(main)
+
+
+class AsyncDLT645Mixin:
+    """
+    Asyncio transport for a DLT645Protocol class
+    
+    Swaps connect/disconnect/read_data for awaitable versions over a
+    pyserial-asyncio-fast stream; framing and decoding come from the
+    protocol class it is mixed into.
+    """
+    
+    WAKEUP = b'\xFE\xFE\xFE\xFE'
+    # Line quiet for this long after a timeout means nothing stale is left
+    QUIET_GAP = 0.05
+    # Line settings differ between meter models; override per protocol class
+    PARITY = serial.PARITY_EVEN
+    
+    def __init__(self, port, address="AAAAAAAAAAAA", baudrate=9600, timeout=1.0):
+        super().__init__(port, address=address, baudrate=baudrate)
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+    
+    async def connect(self):
+        self.reader, self.writer = await serial_asyncio_fast.open_serial_connection(
+            url=self.port,
+            baudrate=self.baudrate,
+            bytesize=8,
+            parity=self.PARITY,
+            stopbits=1
+        )
+    
+    async def disconnect(self):
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+            self.reader = None
+    
+    async def _read_frame(self):
+        """Awaitable dlt645_fast.read_frame: skip to 68H, then read by the length byte"""
+        start = bytes([self.FRAME_START])
+        await self.reader.readuntil(start)
+        header = start + await self.reader.readexactly(9)
+        return header + await self.reader.readexactly(header[9] + 2)
+    
+    async def _receive(self, data_id):
+        while True:
+            parsed = self._parse_response(await self._read_frame())
+            # Skip a late answer to an earlier request that timed out
+            if parsed['data_id'] in (data_id, None):
+                return parsed
+    
+    async def _drain_stale(self):
+        """Discard input until the line goes quiet"""
+        # A timeout can cancel _read_frame mid-frame; the rest of that frame
+        # must not be left for the next readuntil() to resync on
+        while True:
+            try:
+                if not await asyncio.wait_for(self.reader.read(256), self.QUIET_GAP):
+                    return
+            except asyncio.TimeoutError:
+                return
+    
+    async def _exchange(self, data_id, frame):
+        """Send one request frame, returns parsed response or None"""
+        if self.writer is None:
+            raise Exception("Serial port not open")
+        
+        self.writer.write(self.WAKEUP + frame)
+        await self.writer.drain()
+        
+        try:
+            return await asyncio.wait_for(self._receive(data_id), self.timeout)
+        except asyncio.TimeoutError:
+            print(f"Reading 0x{data_id:08X}... ✗ No response from meter")
+        except Exception as e:
+            print(f"Reading 0x{data_id:08X}... ✗ {e}")
+        await self._drain_stale()
+        return None
+    
+    async def read_data(self, data_id):
+        """Read data from meter, returns parsed response or None"""
+        return await self._exchange(data_id, self._build_frame(self.CMD_READ_DATA, data_id))
+    
+    async def read_many(self, data_ids):
+        """
+        Read several registers back to back
+        
+        Transactions still run one at a time (the meter answers one request
+        per frame); only the frame building is done up front, so each
+        request goes out as soon as the previous response (or timeout) is
+        in. Returns a dict of data ID -> parsed response (None where the
+        read failed).
+        """
+        frames = [(di, self._build_frame(self.CMD_READ_DATA, di)) for di in data_ids]
+        
+        results = {}
+        for di, frame in frames:
+            results[di] = await self._exchange(di, frame)
+        return results
+
+
+class AsyncDLT645Protocol(AsyncDLT645Mixin, DLT645Protocol):
+    """DL/T 645-2007 Protocol over an asyncio serial stream"""
+
+
+# Registers to read; format and scaling come from DI_INFO
+READINGS = (
+    DLT645Protocol.DI_TOTAL_ACTIVE_ENERGY,
+    DLT645Protocol.DI_FORWARD_ACTIVE,
+    DLT645Protocol.DI_REVERSE_ACTIVE,
+    DLT645Protocol.DI_REMAINING_ENERGY,
+    DLT645Protocol.DI_VOLTAGE,
+    DLT645Protocol.DI_CURRENT,
+    DLT645Protocol.DI_ACTIVE_POWER,
+)
+
+
+async def read_all_meter_data(port="/dev/ttyUSB0", address="AAAAAAAAAAAA"):
+    """Read the main registers from the meter"""
+    
+    print("="*70)
+    print("DL/T 645-2007 Async Meter Reader - DDSY5558")
+    print("="*70)
+    print(f"Port: {port}")
+    print(f"Address: {address}")
+    print("="*70)
+    
+    meter = AsyncDLT645Protocol(port, address=address)
+    started = time.monotonic()
+    
+    try:
+        await meter.connect()
+        
+        results = await meter.read_many(READINGS)
+        
+        for di in READINGS:
+            result = results[di]
+            if result is None:
+                continue
+            nbytes, decimals, unit, label = DI_INFO[di]
+            value = meter.decode(di, result['data'])
+            if value is None:
+                print(f"  {label + ':':<24} Unable to decode")
+            else:
+                print(f"  {label + ':':<24} {value:>12.{decimals}f} {unit}")
+        
+        print("="*70)
+        print(f"✓ Done in {time.monotonic() - started:.2f} s")
+        return True
+    
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        return False
+    
+    finally:
+        await meter.disconnect()
+
+
+if __name__ == "__main__":
+    port = sys.argv[1] if len(sys.argv) > 1 else "/dev/ttyUSB0"
+    address = sys.argv[2] if len(sys.argv) > 2 else "AAAAAAAAAAAA"
+    
+    success = run(read_all_meter_data(port, address))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Shared Frame Helpers and Compiled Kernels for DL/T 645-2007
+The 33H/BCD tables, DI word transforms and frame reader every reader
+script uses, plus checksum, 33H transform and BCD decode kernels.
+The kernels are off unless DLT645_JIT=1 is set and numba is installed: on frames this
+short the numpy conversions cost more than the compiled loop saves, so
+callers keep their bytes.translate path by default and only route
+through these functions when JIT_ENABLED is true
+"""
+
+import os
+
+numba = None
+np = None
+if os.environ.get("DLT645_JIT") == "1":
+    try:
+        # Optional JIT (pulls in numpy, ~0.3 s of import time)
+        import numba
+        import numpy as np
+    except ImportError:
+        numba = None
+
+JIT_ENABLED = numba is not None
+
+FRAME_START = 0x68
+FRAME_END = 0x16
+CMD_READ_DATA = 0x11
+
+# Translation tables for the +33H/-33H data field transform (mod 256)
+ADD33 = bytes((b + 0x33) & 0xFF for b in range(256))
+SUB33 = bytes((b - 0x33) & 0xFF for b in range(256))
+
+# BCD byte -> 0..99, with 0xFF marking bytes that hold a non-decimal nibble
+BCD_LUT = bytes((b >> 4) * 10 + (b & 0x0F) if (b >> 4) < 10 and (b & 0x0F) < 10 else 0xFF
+                for b in range(256))
+
+
+def di_add_33h(data_id):
+    """
+    DI word plus 33H on every byte, as one integer op
+    
+    Adds inside the low 7 bits of each byte, then XORs the top bits back
+    in so no carry crosses into the next byte.
+    """
+    return ((data_id & 0x7F7F7F7F) + 0x33333333) ^ (data_id & 0x80808080)
+
+
+def di_sub_33h(word):
+    """DI word minus 33H on every byte; top bits set first so no borrow crosses bytes"""
+    return ((word | 0x80808080) - 0x33333333) ^ (~word & 0x80808080)
+
+
+def read_frame(ser):
+    """
+    Read one response frame from a port with read_until()/read()
+    
+    Returns as soon as the end byte arrives; a short result means the
+    meter stopped answering before the frame was complete.
+    """
+    start = bytes([FRAME_START])
+    
+    # Skip any FE wake-up bytes the meter sends ahead of the frame
+    if not ser.read_until(start).endswith(start):
+        return b''
+    
+    header = start + ser.read(9)
+    if len(header) < 10:
+        return header
+    
+    # Length byte tells us how much is left: data field + CS + 16H
+    return header + ser.read(header[9] + 2)
+
+# _parse_kernel status codes
+_OK, _SHORT, _MARKERS, _START2, _LENGTH, _CHECKSUM = range(6)
+
+
+def _build_read_kernel(addr, data_id, out):
+    """Fill out[0:16] with a read-data frame for a 6-byte wire address"""
+    out[0] = FRAME_START
+    for i in range(6):
+        out[1 + i] = addr[i]
+    out[7] = FRAME_START
+    out[8] = CMD_READ_DATA
+    out[9] = 4
+    for i in range(4):
+        out[10 + i] = ((data_id >> (8 * i)) + 0x33) & 0xFF
+    
+    cs = 0
+    for i in range(14):
+        cs += out[i]
+    out[14] = cs & 0xFF
+    out[15] = FRAME_END
+
+
+def _parse_kernel(buf, out):
+    """
+    Check a response frame and write its data field (minus 33H) to out
+    
+    Returns (status, control, length, data_id, checksum). Every field is
+    a separate integer so numba never has to unify them into a float;
+    checksum is the calculated one, reported on a mismatch.
+    """
+    n = len(buf)
+    if n < 12:
+        return _SHORT, 0, 0, -1, 0
+    if buf[0] != FRAME_START or buf[n - 1] != FRAME_END:
+        return _MARKERS, 0, 0, -1, 0
+    if buf[7] != FRAME_START:
+        return _START2, 0, 0, -1, 0
+    
+    length = int(buf[9])
+    if n != 12 + length:
+        return _LENGTH, 0, length, -1, 0
+    
+    cs = 0
+    for i in range(10 + length):
+        cs += int(buf[i])
+    cs &= 0xFF
+    if cs != int(buf[10 + length]):
+        return _CHECKSUM, 0, length, -1, cs
+    
+    for i in range(length):
+        out[i] = (int(buf[10 + i]) - 0x33) & 0xFF
+    
+    data_id = -1
+    if length >= 4:
+        data_id = (int(out[0]) | (int(out[1]) << 8)
+                   | (int(out[2]) << 16) | (int(out[3]) << 24))
+    return _OK, int(buf[8]), length, data_id, cs
+
+
+def _bcd_kernel(data, nbytes):
+    """Little-endian packed BCD -> int, or -1 on a non-decimal nibble"""
+    value = 0
+    for i in range(nbytes - 1, -1, -1):
+        b = int(data[i])
+        hi = b >> 4
+        lo = b & 0x0F
+        if hi > 9 or lo > 9:
+            return -1
+        value = value * 100 + hi * 10 + lo
+    return value
+
+
+if JIT_ENABLED:
+    _build_read_kernel = numba.njit(cache=True)(_build_read_kernel)
+    _parse_kernel = numba.njit(cache=True)(_parse_kernel)
+    _bcd_kernel = numba.njit(cache=True)(_bcd_kernel)
+
+
+def _as_buffer(data):
+    return np.frombuffer(data, dtype=np.uint8) if JIT_ENABLED else data
+
+
+def _scratch(size):
+    return np.empty(size, dtype=np.uint8) if JIT_ENABLED else bytearray(size)
+
+
+def build_read_frame(address, data_id):
+    """Read-data frame (16 bytes) for a 6-byte address in wire order"""
+    out = _scratch(16)
+    _build_read_kernel(_as_buffer(address), data_id, out)
+    return bytes(out)
+
+
+def parse_frame(response):
+    """
+    Validate a response frame and strip it down to its fields
+    
+    Returns (control, data_id, data) with the 33H offset removed from
+    data; data_id is None when the data field is shorter than a DI.
+    Raises ValueError on a malformed frame.
+    """
+    out = _scratch(256)
+    status, control, length, data_id, checksum = _parse_kernel(_as_buffer(response), out)
+    # Compiled kernels hand back numpy scalars; callers format these with :X
+    status, control, length = int(status), int(control), int(length)
+    
+    if status == _SHORT:
+        raise ValueError(f"Response too short: {len(response)} bytes")
+    if status == _MARKERS:
+        raise ValueError(f"Invalid frame markers: {bytes(response).hex()}")
+    if status == _START2:
+        raise ValueError(f"Invalid second start byte: {response[7]:02x}")
+    if status == _LENGTH:
+        raise ValueError(f"Length mismatch: expected {12 + length}, got {len(response)}")
+    if status == _CHECKSUM:
+        raise ValueError(f"Checksum mismatch: {response[10 + length]:02x} vs {int(checksum):02x}")
+    
+    if length >= 4:
+        return control, int(data_id), bytes(out[4:length])
+    return control, None, bytes(out[:length])
+
+
+def decode_bcd(data, nbytes):
+    """First nbytes of data as a little-endian BCD integer, or None"""
+    if len(data) < nbytes:
+        return None
+    value = _bcd_kernel(_as_buffer(data), nbytes)
+    return None if value < 0 else value
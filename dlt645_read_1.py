@@ -5,12 +5,72 @@ Reads all available energy, demand, and instantaneous data
 Includes discovery mode and export functionality
 """
 
+import asyncio
+import os
+import select
 import serial
+from array import array
 import time
 import sys
 import json
 from datetime import datetime
 
+try:
+    # Optional faster JSON encoder; the stdlib json module is used otherwise
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Optional asyncio transport, only needed to read several ports at once
+    from dlt645_async import AsyncDLT645Mixin, run as run_async
+except ImportError:
+    AsyncDLT645Mixin = None
+
+# Shared tables and DI transform; the compiled kernels are opt-in through
+# DLT645_JIT=1
+from dlt645_fast import ADD33, SUB33, BCD_LUT, di_add_33h
+from dlt645_fast import JIT_ENABLED as _JIT_ENABLED, parse_frame
+
+# Everything read_all_meter_data reports, in reading order:
+# (data ID, readings key, decoder, label, unit, format), or (None, section title)
+REGISTERS = (
+    (None, "ENERGY REGISTERS (kWh)"),
+    (0x00000000, 'total_active_energy', 'decode_energy', "Total Active Energy", "kWh", "12.2f"),
+    (0x00010000, 'forward_active_energy', 'decode_energy', "Forward Active Energy", "kWh", "12.2f"),
+    (0x00020000, 'reverse_active_energy', 'decode_energy', "Reverse Active Energy", "kWh", "12.2f"),
+    (0x00900100, 'remaining_energy', 'decode_energy', "Remaining Energy", "kWh [PREPAID]", "12.2f"),
+    (None, "TARIFF REGISTERS (kWh)"),
+    (0x00010100, 'tariff_1', 'decode_energy', "Tariff 1", "kWh", "12.2f"),
+    (0x00010200, 'tariff_2', 'decode_energy', "Tariff 2", "kWh", "12.2f"),
+    (0x00010300, 'tariff_3', 'decode_energy', "Tariff 3", "kWh", "12.2f"),
+    (0x00010400, 'tariff_4', 'decode_energy', "Tariff 4", "kWh", "12.2f"),
+    (None, "INSTANTANEOUS VALUES"),
+    (0x02010100, 'voltage', 'decode_voltage', "Total Voltage", "V", "12.1f"),
+    (0x02010101, 'phase_a_voltage', 'decode_voltage', "Phase A Voltage", "V", "12.1f"),
+    (0x02010102, 'phase_b_voltage', 'decode_voltage', "Phase B Voltage", "V", "12.1f"),
+    (0x02010103, 'phase_c_voltage', 'decode_voltage', "Phase C Voltage", "V", "12.1f"),
+    (0x02020100, 'current', 'decode_current', "Total Current", "A", "12.3f"),
+    (0x02020101, 'phase_a_current', 'decode_current', "Phase A Current", "A", "12.3f"),
+    (0x02020102, 'phase_b_current', 'decode_current', "Phase B Current", "A", "12.3f"),
+    (0x02020103, 'phase_c_current', 'decode_current', "Phase C Current", "A", "12.3f"),
+    (0x02030000, 'active_power', 'decode_power', "Total Active Power", "kW", "12.4f"),
+    (0x02030101, 'phase_a_active_power', 'decode_power', "Phase A Active Power", "kW", "12.4f"),
+    (0x02030102, 'phase_b_active_power', 'decode_power', "Phase B Active Power", "kW", "12.4f"),
+    (0x02030103, 'phase_c_active_power', 'decode_power', "Phase C Active Power", "kW", "12.4f"),
+    (0x02040000, 'reactive_power', 'decode_power', "Total Reactive Power", "kvar", "12.4f"),
+    (0x02040101, 'phase_a_reactive_power', 'decode_power', "Phase A Reactive Power", "kvar", "12.4f"),
+    (0x02040102, 'phase_b_reactive_power', 'decode_power', "Phase B Reactive Power", "kvar", "12.4f"),
+    (0x02040103, 'phase_c_reactive_power', 'decode_power', "Phase C Reactive Power", "kvar", "12.4f"),
+    (0x02060000, 'power_factor', 'decode_power_factor', "Total Power Factor", "", "12.3f"),
+    (0x02060101, 'phase_a_power_factor', 'decode_power_factor', "Phase A Power Factor", "", "12.3f"),
+    (0x02060102, 'phase_b_power_factor', 'decode_power_factor', "Phase B Power Factor", "", "12.3f"),
+    (0x02060103, 'phase_c_power_factor', 'decode_power_factor', "Phase C Power Factor", "", "12.3f"),
+    (0x02800002, 'frequency', 'decode_frequency', "Frequency", "Hz", "12.2f"),
+    (None, "DEMAND"),
+    (0x01010000, 'max_demand', 'decode_power', "Maximum Demand", "kW", "12.4f"),
+)
+
 class DLT645Protocol:
     """DL/T 645-2007 Protocol Implementation"""
     
@@ -56,28 +116,47 @@ class DLT645Protocol:
     DI_PHASE_B_POWER_FACTOR = 0x02060102   # Phase B power factor
     DI_PHASE_C_POWER_FACTOR = 0x02060103   # Phase C power factor
     
+    # Registers read_all_meter_data asks for, in order
+    ALL_DATA_IDS = tuple(reg[0] for reg in REGISTERS if reg[0] is not None)
+    
+    WAKEUP = b'\xFE\xFE\xFE\xFE'
+    
+    # DL/T 645 allows the meter up to 500 ms to start its answer
+    RESPONSE_TIMEOUT = 0.5
+    
     def __init__(self, port, address="AAAAAAAAAAAA", baudrate=9600):
         self.port = port
         self.address = self._format_address(address)
         self.baudrate = baudrate
         self.ser = None
+        # Address and control code are fixed, so every request frame
+        # read_all_meter_data sends can be built once up front
+        self._frames = {di: self._build_frame(self.CMD_READ_DATA, di) for di in self.ALL_DATA_IDS}
+        # Quiet time kept on the bus between one answer and the next request
+        self._min_gap = 0.05
+        self._last_io = 0.0
+        # Idle time between wake-up bytes and frame; 0 sends them as one
+        # write, raised only if the first request after connect goes unanswered
+        self._wake_gap = 0
+        self._wake_checked = False
+        # Receive buffer reused for every response (largest frame: L = 255)
+        self._rx_buf = bytearray(12 + 255)
+        self._rx_view = memoryview(self._rx_buf)
+        self._fd = None
         
     def _format_address(self, addr):
         """Format address to 6 bytes BCD"""
-        addr = addr.zfill(12)
-        addr_bytes = bytearray()
-        for i in range(0, 12, 2):
-            byte_val = int(addr[i:i+2], 16)
-            addr_bytes.append(byte_val)
-        return bytes(reversed(addr_bytes))
+        # One C-level parse of the 12 digits, reversed to wire order (LSB first)
+        return bytes.fromhex(addr.zfill(12))[::-1]
     
     def _add_33h(self, data):
-        return bytes([b + 0x33 for b in data])
+        return data.translate(ADD33)
     
     def _sub_33h(self, data):
-        return bytes([b - 0x33 for b in data])
+        return data.translate(SUB33)
     
     def _calculate_checksum(self, data):
+        # Works on any bytes-like object, no copy needed
         return sum(data) & 0xFF
     
     def _build_frame(self, control_code, data_id):
@@ -87,9 +166,8 @@ class DLT645Protocol:
         frame.append(self.FRAME_START)
         frame.append(control_code)
         
-        # Data identifier (4 bytes, little endian)
-        di_bytes = data_id.to_bytes(4, byteorder='little')
-        data_field = self._add_33h(di_bytes)
+        # Data identifier (4 bytes, little endian) plus 33H on every byte
+        data_field = di_add_33h(data_id).to_bytes(4, byteorder='little')
         
         frame.append(len(data_field))
         frame.extend(data_field)
@@ -101,6 +179,19 @@ class DLT645Protocol:
         return bytes(frame)
     
     def _parse_response(self, response):
+        if _JIT_ENABLED:
+            control, data_id, data = parse_frame(response)
+            # Keep data IDs plain ints so JSON export and DI compares match
+            # the pure Python path
+            if data_id is not None:
+                data_id = int(data_id)
+            return {
+                'control': control,
+                'data_id': data_id,
+                'data': data,
+                'raw': response
+            }
+        
         if len(response) < 12:
             raise ValueError(f"Response too short: {len(response)} bytes")
         
@@ -112,13 +203,18 @@ class DLT645Protocol:
         
         control = response[8]
         length = response[9]
-        data_field = response[10:10+length]
-        checksum_received = response[10+length]
-        
-        checksum_calculated = self._calculate_checksum(response[0:10+length])
+        if len(response) != 12 + length:
+            raise ValueError(f"Length mismatch")
+        
+        # CS covers every byte before itself; summing the whole frame and
+        # taking CS and 16H back off avoids copying that prefix out first
+        checksum_received = response[-2]
+        checksum_calculated = (self._calculate_checksum(response) - checksum_received
+                               - self.FRAME_END) & 0xFF
         if checksum_received != checksum_calculated:
             raise ValueError(f"Checksum mismatch")
         
+        data_field = response[10:10+length]
         if data_field:
             data_field = self._sub_33h(data_field)
         
@@ -143,59 +239,128 @@ class DLT645Protocol:
             bytesize=8,
             parity=serial.PARITY_EVEN,
             stopbits=1,
-            timeout=2
+            timeout=self.RESPONSE_TIMEOUT
         )
+        # POSIX ports expose their fd, so responses can be waited for with
+        # select and read straight into the receive buffer
+        try:
+            self._fd = self.ser.fileno()
+        except (AttributeError, OSError):
+            self._fd = None
         time.sleep(0.3)
         self.ser.reset_input_buffer()
         self.ser.reset_output_buffer()
+        self._wake_gap = 0
+        self._wake_checked = False
     
     def disconnect(self):
         if self.ser and self.ser.is_open:
             self.ser.close()
     
+    def __enter__(self):
+        self.connect()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.disconnect()
+    
+    def _read_frame(self):
+        """Read one response frame, returning as soon as its end byte arrives"""
+        start = bytes([self.FRAME_START])
+        
+        # Skip any FE wake-up bytes the meter sends ahead of the frame
+        if not self.ser.read_until(start).endswith(start):
+            return b''
+        
+        self._rx_buf[0] = self.FRAME_START
+        end = self._read_into(1, 9)
+        
+        # Length byte tells us how much is left: data field + CS + 16H
+        if end == 10:
+            end = self._read_into(10, self._rx_buf[9] + 2)
+        return bytes(self._rx_view[:end])
+    
+    def _read_into(self, offset, size):
+        """Fill size bytes of the receive buffer at offset, returns the new end"""
+        end = offset + size
+        
+        if self._fd is None:
+            while offset < end:
+                n = self.ser.readinto(self._rx_view[offset:end])
+                if not n:
+                    break
+                offset += n
+            return offset
+        
+        # Sleep in select until bytes are actually there, then take all of
+        # them in one readv with no in_waiting ioctl or temporary bytes
+        deadline = time.monotonic() + self.ser.timeout
+        while offset < end:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self._fd], [], [], remaining)[0]:
+                break
+            try:
+                n = os.readv(self._fd, [self._rx_view[offset:end]])
+            except BlockingIOError:
+                continue
+            if not n:
+                break
+            offset += n
+        return offset
+    
+    def _write_request(self, frame):
+        """Put wake-up bytes and frame on the wire"""
+        if self._wake_gap:
+            self.ser.write(self.WAKEUP)
+            self.ser.flush()
+            time.sleep(self._wake_gap)
+            self.ser.write(frame)
+        else:
+            # Wake-up bytes (required for each request) and frame in one write
+            self.ser.write(self.WAKEUP + frame)
+        
+        # Wait until it is all out, so the read timeout only covers the meter
+        self.ser.flush()
+    
     def _send_frame(self, frame, retries=1):
         if not self.ser or not self.ser.is_open:
             raise Exception("Serial port not open")
         
         for attempt in range(retries):
+            # Keep the minimum gap since the last answer, without a fixed sleep
+            wait = self._last_io + self._min_gap - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            
             try:
-                # Clear buffers
+                # Drop anything left over from an earlier, timed-out request
                 self.ser.reset_input_buffer()
-                self.ser.reset_output_buffer()
-                time.sleep(0.3)
-                
-                # Send wake-up bytes (required for each request)
-                wakeup = b'\xFE\xFE\xFE\xFE'
-                self.ser.write(wakeup)
-                time.sleep(0.1)
-                
-                # Send frame
-                self.ser.write(frame)
-                time.sleep(0.6)
-                
-                # Read response
-                response = bytearray()
-                timeout = time.time() + 3.0
                 
-                while time.time() < timeout:
-                    if self.ser.in_waiting > 0:
-                        chunk = self.ser.read(self.ser.in_waiting)
-                        response.extend(chunk)
-                        timeout = time.time() + 0.5
-                    time.sleep(0.05)
+                self._write_request(frame)
                 
-                if response:
-                    return bytes(response)
-                
-                # If no response, wait longer before retry
-                if attempt < retries - 1:
-                    time.sleep(1.0)
-                    
-            except Exception as e:
-                if attempt < retries - 1:
-                    time.sleep(1.0)
-                else:
+                # Blocks until the frame is complete or the meter stays silent
+                response = self._read_frame()
+            except Exception:
+                if attempt == retries - 1:
                     raise
+                continue
+            finally:
+                self._last_io = time.monotonic()
+            
+            if response:
+                self._wake_checked = True
+                return response
+        
+        if not self._wake_checked and not self._wake_gap:
+            # Some meters need idle time after the wake-up preamble; if the
+            # first request after connect goes unanswered, try once with a gap
+            self._wake_checked = True
+            self._wake_gap = 0.1
+            try:
+                return self._send_frame(frame, retries)
+            except Exception:
+                self._wake_gap = 0
+                raise
         
         raise Exception("No response from meter")
     
@@ -204,7 +369,9 @@ class DLT645Protocol:
         if not silent:
             print(f"Reading 0x{data_id:08X}...", end=" ")
         
-        frame = self._build_frame(self.CMD_READ_DATA, data_id)
+        frame = self._frames.get(data_id)
+        if frame is None:
+            frame = self._build_frame(self.CMD_READ_DATA, data_id)
         
         try:
             response = self._send_frame(frame)
@@ -213,102 +380,71 @@ class DLT645Protocol:
             if not silent:
                 print(f"OK ({len(parsed['data'])} bytes)")
             
-            # Wait between successful reads to avoid overwhelming the meter
-            time.sleep(1.5)
-            
             return parsed
         except Exception as e:
             if not silent:
                 print(f"FAIL {e}")
-            
-            # Shorter wait after failures (likely non-existent register)
-            time.sleep(0.5)
             return None
     
-    def decode_energy(self, data):
-        """Decode 4-byte BCD energy value (XXXXXX.XX kWh)"""
-        if not data or len(data) < 4:
+    def _decode_bcd(self, data, nbytes, decimals):
+        """Decode little-endian BCD bytes with integer math (None if not valid BCD)"""
+        if not data or len(data) < nbytes:
             return None
         
-        value_str = ""
-        for byte in reversed(data[:4]):
-            value_str += f"{byte:02X}"
-        
-        if len(value_str) >= 2:
-            value_str = value_str[:-2] + "." + value_str[-2:]
-        
-        try:
-            return float(value_str)
-        except:
-            return None
+        value = 0
+        for byte in reversed(data[:nbytes]):
+            digits = BCD_LUT[byte]
+            if digits == 0xFF:
+                return None
+            value = value * 100 + digits
+        return value / 10 ** decimals
+    
+    def decode_energy(self, data):
+        """Decode 4-byte BCD energy value (XXXXXX.XX kWh)"""
+        return self._decode_bcd(data, 4, 2)
     
     def decode_voltage(self, data):
         """Decode 2-byte BCD voltage (XXX.X V)"""
-        if not data or len(data) < 2:
-            return None
-        
-        value_str = ""
-        for byte in reversed(data[:2]):
-            value_str += f"{byte:02X}"
-        
-        if len(value_str) >= 1:
-            value_str = value_str[:-1] + "." + value_str[-1:]
-        
-        try:
-            return float(value_str)
-        except:
-            return None
+        return self._decode_bcd(data, 2, 1)
     
     def decode_current(self, data):
         """Decode 3-byte BCD current (XXX.XXX A)"""
-        if not data or len(data) < 3:
-            return None
-        
-        value_str = ""
-        for byte in reversed(data[:3]):
-            value_str += f"{byte:02X}"
-        
-        if len(value_str) >= 3:
-            value_str = value_str[:-3] + "." + value_str[-3:]
-        
-        try:
-            return float(value_str)
-        except:
-            return None
+        return self._decode_bcd(data, 3, 3)
     
     def decode_power(self, data):
         """Decode 3-byte BCD power (XX.XXXX kW)"""
-        if not data or len(data) < 3:
-            return None
-        
-        value_str = ""
-        for byte in reversed(data[:3]):
-            value_str += f"{byte:02X}"
-        
-        if len(value_str) >= 4:
-            value_str = value_str[:-4] + "." + value_str[-4:]
-        
-        try:
-            return float(value_str)
-        except:
-            return None
+        return self._decode_bcd(data, 3, 4)
+    
+    def decode_power_factor(self, data):
+        """Decode BCD power factor (X.XXX)"""
+        return self.decode_generic_bcd(data, decimal_places=3)
+    
+    def decode_frequency(self, data):
+        """Decode BCD frequency (XX.XX Hz)"""
+        return self.decode_generic_bcd(data, decimal_places=2)
     
     def decode_generic_bcd(self, data, decimal_places=2):
         """Decode generic BCD value with configurable decimal places"""
-        if not data:
-            return None
-        
-        value_str = ""
-        for byte in reversed(data):
-            value_str += f"{byte:02X}"
-        
-        if decimal_places > 0 and len(value_str) >= decimal_places:
-            value_str = value_str[:-decimal_places] + "." + value_str[-decimal_places:]
-        
-        try:
-            return float(value_str) if value_str and value_str != "." else None
-        except:
-            return None
+        return self._decode_bcd(data, len(data) if data else 0, decimal_places)
+    
+    def decode_readings(self, results):
+        """Turn {DI: parsed response} into {readings key: value} using REGISTERS"""
+        readings = {}
+        for di, *entry in REGISTERS:
+            if di is None:
+                continue
+            key, decoder = entry[:2]
+            result = results.get(di)
+            # Error replies carry no DI: register not present on this meter
+            if result and result['data_id'] == di:
+                value = getattr(self, decoder)(result['data'])
+                if value is not None:
+                    readings[key] = value
+        return readings
+    
+    def poll(self):
+        """Read every register in REGISTERS once without printing"""
+        return self.decode_readings({di: self.read_data(di, silent=True) for di in self.ALL_DATA_IDS})
     
     def discover_data_ids(self, start=0x00000000, end=0x00FFFFFF, step=0x00000100):
         """Discover available data IDs (slow, for mapping)"""
@@ -332,256 +468,221 @@ class DLT645Protocol:
             di += step
         
         return found
+    
+    def discover_data_ids_fast(self, start=0x00000000, end=0x00FFFFFF, step=0x00000100,
+                               timeout=0.15, skip_on_fail_streak=None):
+        """
+        Discover available data IDs with tight per-probe timeouts
+        
+        Each probe is one write and one blocking read bounded by timeout,
+        with no sleeps in between. Only DIs the meter answers with a normal
+        (non-error) reply count as found. With skip_on_fail_streak=N, N
+        misses in a row jump the scan to the next DI2 boundary (the next
+        multiple of 0x10000); DL/T 645 IDs come in clusters per DI2 group,
+        so this skips the rest of an empty group at the risk of missing
+        isolated IDs late in it.
+        
+        Returns an array('I') of the data IDs found.
+        """
+        print("Discovering available data IDs (fast scan)...")
+        found = array('I')
+        
+        port_timeout, self.ser.timeout = self.ser.timeout, timeout
+        try:
+            di = start
+            misses = 0
+            while di <= end:
+                try:
+                    parsed = self._parse_response(self._send_frame(self._build_frame(self.CMD_READ_DATA, di)))
+                    hit = parsed['data_id'] == di
+                except Exception:
+                    hit = False
+                
+                if hit:
+                    found.append(di)
+                    print(f"  Found: 0x{di:08X} ({len(parsed['data'])} bytes)")
+                    misses = 0
+                elif skip_on_fail_streak:
+                    misses += 1
+                    if misses >= skip_on_fail_streak:
+                        misses = 0
+                        di = (di | 0xFFFF) + 1
+                        continue
+                
+                di += step
+        finally:
+            self.ser.timeout = port_timeout
+        
+        return found
 
 
-def read_all_meter_data(port="/dev/ttyUSB0", address="AAAAAAAAAAAA", export_json=False):
-    """Read all available data from meter"""
-    
-    print("="*70)
-    print("DL/T 645-2007 Comprehensive Meter Reader - DDSY5558")
-    print("="*70)
-    print(f"Port: {port}")
-    print(f"Address: {address}")
-    print(f"Baud: 9600, Parity: Even")
-    print(f"Timestamp: {datetime.now().isoformat()}")
-    print("="*70)
+def _write_json(filename, data):
+    """Export data as indented JSON, through orjson when it is installed"""
+    if orjson is not None:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=2)
+
+
+def poll_meter(port="/dev/ttyUSB0", address="AAAAAAAAAAAA", interval=10.0):
+    """
+    Read the meter every interval seconds on one open connection
     
-    meter = DLT645Protocol(port, address=address)
-    data_log = {'timestamp': datetime.now().isoformat(), 'readings': {}}
+    The port stays open between cycles (no reopen, no DTR/RTS toggling)
+    and each snapshot is printed as one JSON line. Runs until Ctrl+C.
+    """
+    with DLT645Protocol(port, address=address) as meter:
+        try:
+            while True:
+                started = time.monotonic()
+                snapshot = {'timestamp': datetime.now().isoformat(), 'readings': meter.poll()}
+                if orjson is not None:
+                    print(orjson.dumps(snapshot).decode(), flush=True)
+                else:
+                    print(json.dumps(snapshot), flush=True)
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            pass
+
+
+if AsyncDLT645Mixin is not None:
+    class AsyncDLT645Protocol(AsyncDLT645Mixin, DLT645Protocol):
+        """DLT645Protocol over an asyncio serial stream"""
+
+
+async def read_meter(port, address="AAAAAAAAAAAA"):
+    """Read every register in REGISTERS from the meter on one port"""
+    meter = AsyncDLT645Protocol(port, address=address, timeout=DLT645Protocol.RESPONSE_TIMEOUT)
+    data_log = {'port': port, 'timestamp': datetime.now().isoformat(), 'readings': {}}
     
     try:
-        # Connect
-        print("\nConnecting...", end=" ")
-        meter.connect()
-        print("OK")
-        
-        print("\n" + "="*70)
-        print("ENERGY REGISTERS (kWh)")
+        await meter.connect()
+        # Registers go out back to back; the bus is half-duplex
+        results = await meter.read_many(meter.ALL_DATA_IDS)
+    except Exception as e:
+        print(f"[ERROR] {port}: {e}")
+        return False, None
+    finally:
+        await meter.disconnect()
+    
+    data_log['readings'] = meter.decode_readings(results)
+    # Every register timing out means no meter answered on this port
+    if not data_log['readings']:
+        return False, None
+    return True, data_log
+
+
+async def read_meters(ports, address="AAAAAAAAAAAA"):
+    """Read one meter per port concurrently; each RS485 adapter is its own bus"""
+    return await asyncio.gather(*(read_meter(port, address) for port in ports))
+
+
+def read_all_meters(ports, address="AAAAAAAAAAAA", export_json=False, verbose=True):
+    """Read the meters on several ports at once and print a summary per port"""
+    
+    if verbose:
         print("="*70)
-        
-        # Total active energy
-        result = meter.read_data(meter.DI_TOTAL_ACTIVE_ENERGY)
-        if result:
-            energy = meter.decode_energy(result['data'])
-            val_str = f"{energy:>12.2f}" if energy else "Unable to decode"
-            print(f"  Total Active Energy:     {val_str} kWh")
-            if energy:
-                data_log['readings']['total_active_energy'] = energy
-        
-        # Forward active energy
-        result = meter.read_data(meter.DI_FORWARD_ACTIVE)
-        if result:
-            energy = meter.decode_energy(result['data'])
-            val_str = f"{energy:>12.2f}" if energy else "Unable to decode"
-            print(f"  Forward Active Energy:   {val_str} kWh")
-            if energy:
-                data_log['readings']['forward_active_energy'] = energy
-        
-        # Reverse active energy
-        result = meter.read_data(meter.DI_REVERSE_ACTIVE)
-        if result:
-            energy = meter.decode_energy(result['data'])
-            val_str = f"{energy:>12.2f}" if energy else "Unable to decode"
-            print(f"  Reverse Active Energy:   {val_str} kWh")
-            if energy:
-                data_log['readings']['reverse_active_energy'] = energy
-        
-        # Remaining energy (prepaid)
-        result = meter.read_data(meter.DI_REMAINING_ENERGY)
-        if result:
-            energy = meter.decode_energy(result['data'])
-            val_str = f"{energy:>12.2f}" if energy else "Unable to decode"
-            print(f"  Remaining Energy:        {val_str} kWh [PREPAID]")
-            if energy:
-                data_log['readings']['remaining_energy'] = energy
-        
-        # Tariff energies
-        print("\n" + "="*70)
-        print("TARIFF REGISTERS (kWh)")
+        print("DL/T 645-2007 Multi-Meter Reader - DDSY5558")
         print("="*70)
-        
-        tariff_dis = [
-            (meter.DI_TARIFF1_ENERGY, "Tariff 1"),
-            (meter.DI_TARIFF2_ENERGY, "Tariff 2"),
-            (meter.DI_TARIFF3_ENERGY, "Tariff 3"),
-            (meter.DI_TARIFF4_ENERGY, "Tariff 4"),
-        ]
-        
-        for di, label in tariff_dis:
-            result = meter.read_data(di)
-            if result:
-                energy = meter.decode_energy(result['data'])
-                if energy:
-                    print(f"  {label:<20}     {energy:>12.2f} kWh")
-                    data_log['readings'][label.lower().replace(" ", "_")] = energy
-        
-        # Instantaneous values
-        print("\n" + "="*70)
-        print("INSTANTANEOUS VALUES")
+        print(f"Ports: {', '.join(ports)}")
+        print(f"Address: {address}")
+        print(f"Timestamp: {datetime.now().isoformat()}")
         print("="*70)
-        
-        # Voltage (Total)
-        result = meter.read_data(meter.DI_VOLTAGE)
-        if result:
-            voltage = meter.decode_voltage(result['data'])
-            val_str = f"{voltage:>12.1f}" if voltage else "Unable to decode"
-            print(f"  Total Voltage:           {val_str} V")
-            if voltage:
-                data_log['readings']['voltage'] = voltage
-        
-        # Phase voltages
-        print("\n  Phase Voltages:")
-        phases_v = [
-            (meter.DI_PHASE_A_VOLTAGE, "A"),
-            (meter.DI_PHASE_B_VOLTAGE, "B"),
-            (meter.DI_PHASE_C_VOLTAGE, "C"),
-        ]
-        
-        for di, phase in phases_v:
-            result = meter.read_data(di)
-            if result:
-                voltage = meter.decode_voltage(result['data'])
-                if voltage:
-                    print(f"    Phase {phase}:           {voltage:>12.1f} V")
-                    data_log['readings'][f'phase_{phase.lower()}_voltage'] = voltage
-        
-        # Current (Total)
-        result = meter.read_data(meter.DI_CURRENT)
-        if result:
-            current = meter.decode_current(result['data'])
-            val_str = f"{current:>12.3f}" if current else "Unable to decode"
-            print(f"\n  Total Current:           {val_str} A")
-            if current:
-                data_log['readings']['current'] = current
-        
-        # Phase currents
-        print("\n  Phase Currents:")
-        phases_i = [
-            (meter.DI_PHASE_A_CURRENT, "A"),
-            (meter.DI_PHASE_B_CURRENT, "B"),
-            (meter.DI_PHASE_C_CURRENT, "C"),
-        ]
-        
-        for di, phase in phases_i:
-            result = meter.read_data(di)
-            if result:
-                current = meter.decode_current(result['data'])
-                if current:
-                    print(f"    Phase {phase}:           {current:>12.3f} A")
-                    data_log['readings'][f'phase_{phase.lower()}_current'] = current
-        
-        # Active power (Total)
-        result = meter.read_data(meter.DI_ACTIVE_POWER)
-        if result:
-            power = meter.decode_power(result['data'])
-            val_str = f"{power:>12.4f}" if power else "Unable to decode"
-            print(f"\n  Total Active Power:      {val_str} kW")
-            if power:
-                data_log['readings']['active_power'] = power
-        
-        # Phase active powers
-        print("\n  Phase Active Powers:")
-        phases_p = [
-            (meter.DI_PHASE_A_POWER, "A"),
-            (meter.DI_PHASE_B_POWER, "B"),
-            (meter.DI_PHASE_C_POWER, "C"),
-        ]
-        
-        for di, phase in phases_p:
-            result = meter.read_data(di)
-            if result:
-                power = meter.decode_power(result['data'])
-                if power:
-                    print(f"    Phase {phase}:           {power:>12.4f} kW")
-                    data_log['readings'][f'phase_{phase.lower()}_active_power'] = power
-        
-        # Reactive power (Total)
-        result = meter.read_data(meter.DI_REACTIVE_POWER)
-        if result:
-            power = meter.decode_power(result['data'])
-            val_str = f"{power:>12.4f}" if power else "Unable to decode"
-            print(f"\n  Total Reactive Power:    {val_str} kvar")
-            if power:
-                data_log['readings']['reactive_power'] = power
-        
-        # Phase reactive powers
-        print("\n  Phase Reactive Powers:")
-        phases_q = [
-            (meter.DI_PHASE_A_REACTIVE, "A"),
-            (meter.DI_PHASE_B_REACTIVE, "B"),
-            (meter.DI_PHASE_C_REACTIVE, "C"),
-        ]
-        
-        for di, phase in phases_q:
-            result = meter.read_data(di)
-            if result:
-                power = meter.decode_power(result['data'])
-                if power:
-                    print(f"    Phase {phase}:           {power:>12.4f} kvar")
-                    data_log['readings'][f'phase_{phase.lower()}_reactive_power'] = power
-        
-        # Power factor (Total)
-        result = meter.read_data(meter.DI_POWER_FACTOR)
-        if result and result['data']:
-            pf = meter.decode_generic_bcd(result['data'], decimal_places=3)
-            if pf:
-                print(f"\n  Total Power Factor:      {pf:>12.3f}")
-                data_log['readings']['power_factor'] = pf
-            else:
-                print(f"\n  Total Power Factor:      Unable to decode")
-        
-        # Phase power factors
-        print("\n  Phase Power Factors:")
-        phases_pf = [
-            (meter.DI_PHASE_A_POWER_FACTOR, "A"),
-            (meter.DI_PHASE_B_POWER_FACTOR, "B"),
-            (meter.DI_PHASE_C_POWER_FACTOR, "C"),
-        ]
-        
-        for di, phase in phases_pf:
-            result = meter.read_data(di)
-            if result:
-                pf = meter.decode_generic_bcd(result['data'], decimal_places=3)
-                if pf:
-                    print(f"    Phase {phase}:           {pf:>12.3f}")
-                    data_log['readings'][f'phase_{phase.lower()}_power_factor'] = pf
-        
-        # Frequency
-        result = meter.read_data(meter.DI_FREQUENCY)
-        if result and result['data']:
-            freq = meter.decode_generic_bcd(result['data'], decimal_places=2)
-            if freq:
-                print(f"\n  Frequency:               {freq:>12.2f} Hz")
-                data_log['readings']['frequency'] = freq
-            else:
-                print(f"\n  Frequency:               Unable to decode")
-        
-        # Max demand
+    
+    if AsyncDLT645Mixin is None:
+        print("\n[ERROR] Reading several ports needs pyserial-asyncio-fast")
+        return False, None
+    
+    results = run_async(read_meters(ports, address))
+    logs = [data_log for ok, data_log in results if ok]
+    
+    for port, (ok, data_log) in zip(ports, results):
+        if not ok:
+            print(f"\n{port}:\n  [FAILED] No data")
+            continue
+        if verbose:
+            print(f"\n{port}:")
+            for key, value in data_log['readings'].items():
+                print(f"  {key:<28} {value:>12}")
+    
+    if export_json and logs:
+        filename = f"meter_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        _write_json(filename, logs)
+        print(f"\n[OK] Data exported to: {filename}")
+    
+    if verbose:
         print("\n" + "="*70)
-        print("DEMAND")
+    print(f"[OK] Meters read: {len(logs)}/{len(ports)}")
+    if verbose:
         print("="*70)
-        
-        result = meter.read_data(meter.DI_MAX_DEMAND)
-        if result:
-            demand = meter.decode_power(result['data'])
-            val_str = f"{demand:>12.4f}" if demand else "Unable to decode"
-            print(f"  Maximum Demand:          {val_str} kW")
-            if demand:
-                data_log['readings']['max_demand'] = demand
+    
+    return len(logs) == len(ports), logs
+
+
+def read_all_meter_data(port="/dev/ttyUSB0", address="AAAAAAAAAAAA", export_json=False, verbose=True):
+    """Read all available data from meter (verbose=False prints only the summary)"""
+    
+    if verbose:
+        print("="*70)
+        print("DL/T 645-2007 Comprehensive Meter Reader - DDSY5558")
+        print("="*70)
+        print(f"Port: {port}")
+        print(f"Address: {address}")
+        print(f"Baud: 9600, Parity: Even")
+        print(f"Timestamp: {datetime.now().isoformat()}")
+        print("="*70)
+    
+    meter = DLT645Protocol(port, address=address)
+    data_log = {'timestamp': datetime.now().isoformat(), 'readings': {}}
+    
+    try:
+        # Connect
+        if verbose:
+            print("\nConnecting...", end=" ")
+        meter.connect()
+        if verbose:
+            print("OK")
+        
+        for di, *entry in REGISTERS:
+            if di is None:
+                if verbose:
+                    print("\n" + "="*70)
+                    print(entry[0])
+                    print("="*70)
+                continue
+            
+            key, decoder, label, unit, fmt = entry
+            result = meter.read_data(di, silent=not verbose)
+            # Error replies carry no DI: register not present on this meter
+            if not result or result['data_id'] != di:
+                continue
+            
+            value = getattr(meter, decoder)(result['data'])
+            if value is not None:
+                data_log['readings'][key] = value
+            if not verbose:
+                continue
+            if value is None:
+                print(f"  {label + ':':<24} Unable to decode")
+            else:
+                print(f"  {label + ':':<24} {value:{fmt}} {unit}".rstrip())
         
         meter.disconnect()
         
         # Export data if requested
         if export_json:
             filename = f"meter_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(filename, 'w') as f:
-                json.dump(data_log, f, indent=2)
+            _write_json(filename, data_log)
             print(f"\n[OK] Data exported to: {filename}")
         
-        print("\n" + "="*70)
-        print("[SUCCESS] Data read complete")
+        if verbose:
+            print("\n" + "="*70)
+            print("[SUCCESS] Data read complete")
         print(f"[OK] Total readings captured: {len(data_log['readings'])}")
-        print("="*70)
+        if verbose:
+            print("="*70)
         
         return True, data_log
         
@@ -597,22 +698,43 @@ def read_all_meter_data(port="/dev/ttyUSB0", address="AAAAAAAAAAAA", export_json
 
 
 if __name__ == "__main__":
-    port = sys.argv[1] if len(sys.argv) > 1 else "/dev/ttyUSB0"
-    address = sys.argv[2] if len(sys.argv) > 2 else "AAAAAAAAAAAA"
+    interval = None
+    if "--interval" in sys.argv:
+        i = sys.argv.index("--interval")
+        interval = float(sys.argv[i + 1])
+        del sys.argv[i:i + 2]
+    
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("-")]
+    port = args[0] if len(args) > 0 else "/dev/ttyUSB0"
+    address = args[1] if len(args) > 1 else "AAAAAAAAAAAA"
     export_json = "--export" in sys.argv or "-j" in sys.argv
+    verbose = not ("--quiet" in sys.argv or "-q" in sys.argv)
     
-    success, data = read_all_meter_data(port, address, export_json=export_json)
+    # Long-running mode: keep the port open and print a JSON line per cycle
+    if interval:
+        poll_meter(port, address, interval)
+        sys.exit(0)
     
-    if success:
-        print("\n[TIPS]")
-        print("   • Use --export flag to save data as JSON")
-        print("   • The broadcast address (AAAAAAAAAAAA) works for all meters")
-        print("   • If you know the meter's specific address, use it for faster queries")
-        print("   • Schedule this script with cron for periodic data collection")
+    # A comma-separated port list reads those meters concurrently
+    if "," in port:
+        success, data = read_all_meters(port.split(","), address, export_json=export_json, verbose=verbose)
     else:
-        print("\n[FAILED] Failed to read meter data")
-        print("   • Check RS485 A/B wiring")
-        print("   • Verify meter is powered and awake")
-        print("   • Try different serial port (e.g., /dev/ttyUSB1)")
+        success, data = read_all_meter_data(port, address, export_json=export_json, verbose=verbose)
+    
+    if verbose:
+        if success:
+            print("\n[TIPS]")
+            print("   • Use --export flag to save data as JSON")
+            print("   • Use --quiet for cron runs (summary line only)")
+            print("   • Use --interval SECONDS to keep polling on one open connection")
+            print("   • Pass several ports separated by commas to read them in parallel")
+            print("   • The broadcast address (AAAAAAAAAAAA) works for all meters")
+            print("   • If you know the meter's specific address, use it for faster queries")
+            print("   • Schedule this script with cron for periodic data collection")
+        else:
+            print("\n[FAILED] Failed to read meter data")
+            print("   • Check RS485 A/B wiring")
+            print("   • Verify meter is powered and awake")
+            print("   • Try different serial port (e.g., /dev/ttyUSB1)")
     
     sys.exit(0 if success else 1)
\ No newline at end of file
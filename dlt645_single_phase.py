@@ -4,12 +4,68 @@ DL/T 645-2007 Reader for DDSY5558 Single-Phase Smart Meter
 Fixed version - separated current and voltage readings
 """
 
+import atexit
 import serial
-import time
+import struct
 import sys
 import json
 from datetime import datetime
 
+try:
+    # Optional asyncio transport (pyserial-asyncio-fast) for the meter scan
+    from dlt645_async import AsyncDLT645Mixin, run as run_async
+except ImportError:
+    AsyncDLT645Mixin = None
+
+# Shared tables and frame helpers; the compiled kernels are opt-in through
+# DLT645_JIT=1
+from dlt645_fast import ADD33, SUB33, BCD_LUT, di_add_33h, di_sub_33h, read_frame
+from dlt645_fast import JIT_ENABLED as _JIT_ENABLED, parse_frame
+
+# Response header: 68H, address (skipped), 68H, control code, data length
+_FRAME_HEADER = struct.Struct('<B6xBBB')
+# Data identifier word at the start of the data field
+_DI_WORD = struct.Struct('<I')
+
+# Report banner rule
+_BAR = "=" * 80
+
+# Open serial handles by (port, baudrate), shared by every DLT645Protocol so
+# repeated read_meter calls on one port skip the open/close; close_ports()
+# releases them, and runs at exit for callers that never call it
+_PORTS = {}
+
+
+def _open_port(port, baudrate, timeout):
+    """Return the cached open handle for (port, baudrate), opening it if needed"""
+    ser = _PORTS.get((port, baudrate))
+    if ser is None or not ser.is_open:
+        ser = serial.Serial(
+            port=port,
+            baudrate=baudrate,
+            bytesize=8,
+            parity=serial.PARITY_NONE,
+            stopbits=1,
+            timeout=timeout
+        )
+        _PORTS[(port, baudrate)] = ser
+    elif ser.timeout != timeout:
+        # Shared handle: the current caller's timeout wins
+        ser.timeout = timeout
+    return ser
+
+
+def close_ports(port=None):
+    """Close the cached serial handles for port, or every one if port is None"""
+    for key in [key for key in _PORTS if port is None or key[0] == port]:
+        ser = _PORTS.pop(key)
+        if ser.is_open:
+            ser.close()
+
+
+atexit.register(close_ports)
+
+
 class DLT645Protocol:
     """DL/T 645-2007 Protocol Implementation"""
     
@@ -33,6 +89,9 @@ class DLT645Protocol:
     DI_TARIFF7_ENERGY = 0x00010700
     DI_TARIFF8_ENERGY = 0x00010800
     
+    # Block read of forward active energy: total followed by each tariff
+    DI_TARIFF_BLOCK = 0x0001FF00
+    
     # Instantaneous values
     DI_VOLTAGE = 0x02010100
     DI_CURRENT = 0x02020100
@@ -46,77 +105,97 @@ class DLT645Protocol:
     DI_MAX_DEMAND = 0x01010000
     DI_CURRENT_DEMAND = 0x03040000
     
+    WAKEUP = b'\xFE\xFE\xFE\xFE'
+    
+    # DL/T 645 allows the meter up to 500 ms to start its answer
+    RESPONSE_TIMEOUT = 0.5
+    
     def __init__(self, port, address="AAAAAAAAAAAA", baudrate=9600):
         self.port = port
         self.address = self._format_address(address)
         self.baudrate = baudrate
         self.ser = None
+        # Request frames only depend on (control, DI) for a fixed address
+        self._frame_cache = {}
+        # 68H + address + 68H + C + L=4 + DI + CS + 16H, with C, DI and CS
+        # left to fill in per request
+        self._frame_template = (bytes([self.FRAME_START]) + self.address
+                                + bytes([self.FRAME_START, 0, 4, 0, 0, 0, 0, 0, self.FRAME_END]))
+        # Checksum share of the template bytes that never change (68H..L)
+        self._template_sum = sum(self._frame_template[:10])
         
     def _format_address(self, addr):
         """Format address to 6 bytes BCD"""
-        addr = addr.zfill(12)
-        addr_bytes = bytearray()
-        for i in range(0, 12, 2):
-            byte_val = int(addr[i:i+2], 16)
-            addr_bytes.append(byte_val)
-        return bytes(reversed(addr_bytes))
+        # 12 digits, parsed in one call and reversed to wire order (LSB first)
+        return bytes.fromhex(addr.zfill(12))[::-1]
     
     def _add_33h(self, data):
-        return bytes([b + 0x33 for b in data])
+        return data.translate(ADD33)
     
     def _sub_33h(self, data):
-        return bytes([b - 0x33 for b in data])
+        return data.translate(SUB33)
     
     def _calculate_checksum(self, data):
+        # Plain sum() is the fastest option here: wrapping a ~30-byte frame
+        # in a memoryview roughly doubles the cost
         return sum(data) & 0xFF
     
     def _build_frame(self, control_code, data_id):
-        frame = bytearray()
-        frame.append(self.FRAME_START)
-        frame.extend(self.address)
-        frame.append(self.FRAME_START)
-        frame.append(control_code)
-        
-        di_bytes = data_id.to_bytes(4, byteorder='little')
-        data_field = self._add_33h(di_bytes)
-        
-        frame.append(len(data_field))
-        frame.extend(data_field)
-        
-        cs = self._calculate_checksum(frame)
-        frame.append(cs)
-        frame.append(self.FRAME_END)
-        
-        return bytes(frame)
+        cached = self._frame_cache.get((control_code, data_id))
+        if cached is not None:
+            return cached
+        
+        frame = bytearray(self._frame_template)
+        frame[8] = control_code
+        di_bytes = di_add_33h(data_id).to_bytes(4, byteorder='little')
+        frame[10:14] = di_bytes
+        frame[14] = (self._template_sum + control_code + sum(di_bytes)) & 0xFF
+        
+        frame = bytes(frame)
+        self._frame_cache[(control_code, data_id)] = frame
+        return frame
     
     def _parse_response(self, response):
+        if _JIT_ENABLED:
+            control, data_id, data = parse_frame(response)
+            # Plain int like the pure Python path, so the async receive
+            # loop and callers compare and format it the same way
+            if data_id is not None:
+                data_id = int(data_id)
+            return {
+                'control': control,
+                'data_id': data_id,
+                'data': data,
+                'raw': response
+            }
+        
         if len(response) < 12:
             raise ValueError(f"Response too short: {len(response)} bytes")
         
-        if response[0] != self.FRAME_START or response[-1] != self.FRAME_END:
+        start, start2, control, length = _FRAME_HEADER.unpack_from(response)
+        
+        if start != self.FRAME_START or response[-1] != self.FRAME_END:
             raise ValueError(f"Invalid frame markers")
         
-        if response[7] != self.FRAME_START:
+        if start2 != self.FRAME_START:
             raise ValueError(f"Invalid second start byte")
         
-        control = response[8]
-        length = response[9]
-        data_field = response[10:10+length]
-        checksum_received = response[10+length]
+        if len(response) != 12 + length:
+            raise ValueError(f"Length mismatch")
         
+        # A short slice plus sum() beats summing through a memoryview here
+        checksum_received = response[10+length]
         checksum_calculated = self._calculate_checksum(response[0:10+length])
         if checksum_received != checksum_calculated:
             raise ValueError(f"Checksum mismatch")
         
-        if data_field:
-            data_field = self._sub_33h(data_field)
-        
-        if len(data_field) >= 4:
-            data_id = int.from_bytes(data_field[0:4], byteorder='little')
-            data = data_field[4:]
+        if length >= 4:
+            word, = _DI_WORD.unpack_from(response, 10)
+            data_id = di_sub_33h(word)
+            data = self._sub_33h(response[14:10+length])
         else:
             data_id = None
-            data = data_field
+            data = self._sub_33h(response[10:10+length])
         
         return {
             'control': control,
@@ -126,21 +205,27 @@ class DLT645Protocol:
         }
     
     def connect(self):
-        self.ser = serial.Serial(
-            port=self.port,
-            baudrate=self.baudrate,
-            bytesize=8,
-            parity=serial.PARITY_NONE,
-            stopbits=1,
-            timeout=2
-        )
-        time.sleep(0.3)
+        self.ser = _open_port(self.port, self.baudrate, self.RESPONSE_TIMEOUT)
         self.ser.reset_input_buffer()
         self.ser.reset_output_buffer()
     
     def disconnect(self):
-        if self.ser and self.ser.is_open:
-            self.ser.close()
+        """
+        Drop this instance's handle; the OS port stays open for reuse
+        until close_ports(port) (or interpreter exit) closes it
+        """
+        self.ser = None
+    
+    def __enter__(self):
+        self.connect()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.disconnect()
+    
+    def _read_frame(self):
+        """Read one response frame, returning as soon as its end byte arrives"""
+        return read_frame(self.ser)
     
     def _send_frame(self, frame, retries=2):
         if not self.ser or not self.ser.is_open:
@@ -148,47 +233,40 @@ class DLT645Protocol:
         
         for attempt in range(retries):
             try:
+                # Drop anything left over from an earlier, timed-out request
                 self.ser.reset_input_buffer()
-                self.ser.reset_output_buffer()
-                time.sleep(0.3)
-                
-                wakeup = b'\xFE\xFE\xFE\xFE'
-                self.ser.write(wakeup)
-                time.sleep(0.1)
-                
-                self.ser.write(frame)
-                time.sleep(0.6)
-                
-                response = bytearray()
-                timeout = time.time() + 3.0
-                
-                while time.time() < timeout:
-                    if self.ser.in_waiting > 0:
-                        chunk = self.ser.read(self.ser.in_waiting)
-                        response.extend(chunk)
-                        timeout = time.time() + 0.5
-                    time.sleep(0.05)
                 
-                if response:
-                    return bytes(response)
+                # Wake-up bytes and frame in one write, then wait until it is
+                # all out so the read timeout only covers the meter's answer
+                self.ser.write(self.WAKEUP + frame)
+                self.ser.flush()
                 
-                if attempt < retries - 1:
-                    time.sleep(1.0)
-                    
-            except Exception as e:
-                if attempt < retries - 1:
-                    time.sleep(0.5)
-                else:
+                # Blocks until the frame is complete or the meter stays silent
+                response = self._read_frame()
+            except serial.SerialException:
+                # The adapter went away (e.g. USB re-enumeration) while the
+                # cached handle still looks open: evict it so the next
+                # connect() opens the port afresh
+                close_ports(self.port)
+                self.ser = None
+                raise
+            except Exception:
+                if attempt == retries - 1:
                     raise
+                continue
+            
+            if response:
+                return response
         
         raise Exception("No response from meter")
     
-    def read_data(self, data_id, silent=False):
+    def read_data(self, data_id, silent=False, frame=None):
         """Read data from meter"""
         if not silent:
             print(f"Reading 0x{data_id:08X}... ", end="", flush=True)
         
-        frame = self._build_frame(self.CMD_READ_DATA, data_id)
+        if frame is None:
+            frame = self._build_frame(self.CMD_READ_DATA, data_id)
         
         try:
             response = self._send_frame(frame)
@@ -197,141 +275,179 @@ class DLT645Protocol:
             if not silent:
                 print(f"OK ({len(parsed['data'])} bytes) - Data: {parsed['data'].hex()}")
             
-            time.sleep(0.3)
-            
             return parsed
         except Exception as e:
             if not silent:
                 print(f"FAIL - {str(e)}")
-            
-            time.sleep(0.2)
             return None
     
-    def decode_energy(self, data):
-        """Decode 4-byte BCD energy value (XXXXXX.XX kWh)"""
-        if not data or len(data) < 4:
+    def read_many(self, data_ids, silent=False):
+        """
+        Read several registers back to back
+        
+        All request frames are built up front, so each request goes out the
+        moment the previous response (or timeout) is in. Returns a dict of
+        data ID -> parsed response (None where the read failed).
+        """
+        frames = [(di, self._build_frame(self.CMD_READ_DATA, di)) for di in data_ids]
+        
+        results = {}
+        for di, frame in frames:
+            results[di] = self.read_data(di, silent=silent, frame=frame)
+        return results
+    
+    def read_all_tariffs(self, silent=False):
+        """
+        Read the tariff energies (kWh) in one request, T1 first
+        
+        Uses the 0x0001FF00 block register, whose data is the total then
+        one 4-byte value per tariff. Falls back to reading T1..T8 one by
+        one if the meter does not answer the block read. Returns a list of
+        8 values, T1..T8, with None for any tariff that could not be read or
+        decoded.
+        """
+        result = self.read_data(self.DI_TARIFF_BLOCK, silent=silent)
+        if result and len(result['data']) >= 8:
+            data = result['data']
+            # Any trailing partial value is dropped (iter_unpack needs whole ones)
+            usable = len(data) - len(data) % 4
+            values = [self.decode_energy(raw) for (raw,) in struct.iter_unpack('<4s', data[:usable])]
+            # Meters send only the tariffs they have; line up with T1..T8
+            values = values[1:9]
+            return values + [None] * (8 - len(values))
+        
+        tariffs = (self.DI_TARIFF1_ENERGY, self.DI_TARIFF2_ENERGY, self.DI_TARIFF3_ENERGY,
+                   self.DI_TARIFF4_ENERGY, self.DI_TARIFF5_ENERGY, self.DI_TARIFF6_ENERGY,
+                   self.DI_TARIFF7_ENERGY, self.DI_TARIFF8_ENERGY)
+        results = self.read_many(tariffs, silent=silent)
+        return [self.decode_energy(results[di]['data']) if results[di] else None for di in tariffs]
+    
+    def _decode_bcd(self, data, nbytes, decimals):
+        """Decode little-endian BCD bytes with integer math (None if not valid BCD)"""
+        if not data or len(data) < nbytes:
             return None
         
-        value_str = ""
-        for byte in reversed(data[:4]):
-            value_str += f"{byte:02X}"
-        
-        if len(value_str) >= 2:
-            value_str = value_str[:-2] + "." + value_str[-2:]
-        
-        try:
-            return float(value_str)
-        except:
-            return None
+        value = 0
+        for byte in reversed(data[:nbytes]):
+            digits = BCD_LUT[byte]
+            if digits == 0xFF:
+                return None
+            value = value * 100 + digits
+        return value / 10 ** decimals
+    
+    def decode_energy(self, data):
+        """Decode 4-byte BCD energy value (XXXXXX.XX kWh)"""
+        return self._decode_bcd(data, 4, 2)
     
     def decode_voltage(self, data):
         """Decode 2-byte BCD voltage (XXX.X V)"""
-        if not data or len(data) < 2:
-            return None
-        
-        value_str = ""
-        for byte in reversed(data[:2]):
-            value_str += f"{byte:02X}"
-        
-        if len(value_str) >= 1:
-            value_str = value_str[:-1] + "." + value_str[-1:]
-        
-        try:
-            return float(value_str)
-        except:
-            return None
+        return self._decode_bcd(data, 2, 1)
     
     def decode_current(self, data):
         """Decode 3-byte BCD current (XXX.XXX A)"""
-        if not data or len(data) < 3:
-            return None
-        
-        value_str = ""
-        for byte in reversed(data[:3]):
-            value_str += f"{byte:02X}"
-        
-        if len(value_str) >= 3:
-            value_str = value_str[:-3] + "." + value_str[-3:]
-        
-        try:
-            return float(value_str)
-        except:
-            return None
+        return self._decode_bcd(data, 3, 3)
     
     def decode_power(self, data):
         """Decode 3-byte BCD power (XX.XXXX kW)"""
-        if not data or len(data) < 3:
-            return None
-        
-        value_str = ""
-        for byte in reversed(data[:3]):
-            value_str += f"{byte:02X}"
-        
-        if len(value_str) >= 4:
-            value_str = value_str[:-4] + "." + value_str[-4:]
-        
-        try:
-            return float(value_str)
-        except:
-            return None
+        return self._decode_bcd(data, 3, 4)
     
     def decode_generic_bcd(self, data, decimal_places=2):
         """Decode generic BCD value with configurable decimal places"""
-        if not data:
-            return None
-        
-        value_str = ""
-        for byte in reversed(data):
-            value_str += f"{byte:02X}"
-        
-        if decimal_places > 0 and len(value_str) >= decimal_places:
-            value_str = value_str[:-decimal_places] + "." + value_str[-decimal_places:]
-        
-        try:
-            return float(value_str) if value_str and value_str != "." else None
-        except:
-            return None
+        return self._decode_bcd(data, len(data) if data else 0, decimal_places)
+
+# Registers read_meter reports, in reading order
+READINGS = (
+    DLT645Protocol.DI_TOTAL_ACTIVE_ENERGY,
+    DLT645Protocol.DI_FORWARD_ACTIVE,
+    DLT645Protocol.DI_REVERSE_ACTIVE,
+    DLT645Protocol.DI_REMAINING_ENERGY,
+    DLT645Protocol.DI_VOLTAGE,
+    DLT645Protocol.DI_CURRENT,
+    DLT645Protocol.DI_ACTIVE_POWER,
+    DLT645Protocol.DI_REACTIVE_POWER,
+    DLT645Protocol.DI_FREQUENCY,
+    DLT645Protocol.DI_POWER_FACTOR,
+)
 
 
-def read_meter(port="/dev/ttyUSB0", address="AAAAAAAAAAAA"):
-    """Read meter data with detailed output"""
+if AsyncDLT645Mixin is not None:
+    class AsyncDLT645Protocol(AsyncDLT645Mixin, DLT645Protocol):
+        """DLT645Protocol over an asyncio serial stream"""
+        PARITY = serial.PARITY_NONE
+        
+        def __init__(self, port, address="AAAAAAAAAAAA", baudrate=9600,
+                     timeout=DLT645Protocol.RESPONSE_TIMEOUT):
+            super().__init__(port, address=address, baudrate=baudrate, timeout=timeout)
+
+
+async def scan(meter):
+    """Connect, read READINGS back to back and disconnect, on the event loop"""
+    await meter.connect()
+    try:
+        return await meter.read_many(READINGS)
+    finally:
+        await meter.disconnect()
+
+
+def read_meter(port="/dev/ttyUSB0", address="AAAAAAAAAAAA", meter=None, use_async=False):
+    """
+    Read meter data with detailed output
+    Pass a DLT645Protocol as meter to reuse it across calls; it is
+    (re)connected here, which reopens the port if it was lost.
+    use_async runs the scan on asyncio (needs pyserial-asyncio-fast).
+    """
+    
+    if meter is not None:
+        port = meter.port
+        address = meter.address[::-1].hex().upper()
     
-    print("="*80)
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    print(_BAR)
     print("DDSY5558 Single-Phase Prepaid Meter - DL/T 645-2007")
-    print("="*80)
+    print(_BAR)
     print(f"Port:      {port}")
     print(f"Address:   {address}")
-    print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("="*80)
-    
-    meter = DLT645Protocol(port, address=address)
+    print(f"Timestamp: {timestamp}")
+    print(_BAR)
     
     try:
-        print("\nConnecting...", end=" ", flush=True)
-        meter.connect()
-        print("OK\n")
+        if meter is not None:
+            meter.connect()
+            results = meter.read_many(READINGS)
+        elif use_async:
+            if AsyncDLT645Mixin is None:
+                raise RuntimeError("Async scan needs pyserial-asyncio-fast installed")
+            print("\nConnecting...", end=" ", flush=True)
+            meter = AsyncDLT645Protocol(port, address=address)
+            results = run_async(scan(meter))
+            print("OK\n")
+        else:
+            print("\nConnecting...", end=" ", flush=True)
+            with DLT645Protocol(port, address=address) as meter:
+                print("OK\n")
+                results = meter.read_many(READINGS)
         
         # Energy Registers
-        print("="*80)
+        print(_BAR)
         print("ENERGY REGISTERS")
-        print("="*80)
+        print(_BAR)
         
-        result = meter.read_data(meter.DI_TOTAL_ACTIVE_ENERGY)
+        result = results[meter.DI_TOTAL_ACTIVE_ENERGY]
         if result and result['data']:
             value = meter.decode_energy(result['data'])
             print(f"Total Active Energy:           {value:.2f} kWh" if value is not None else "Total Active Energy:           Failed to decode")
         
-        result = meter.read_data(meter.DI_FORWARD_ACTIVE)
+        result = results[meter.DI_FORWARD_ACTIVE]
         if result and result['data']:
             value = meter.decode_energy(result['data'])
             print(f"Forward Active Energy:         {value:.2f} kWh" if value is not None else "Forward Active Energy:         Failed to decode")
         
-        result = meter.read_data(meter.DI_REVERSE_ACTIVE)
+        result = results[meter.DI_REVERSE_ACTIVE]
         if result and result['data']:
             value = meter.decode_energy(result['data'])
             print(f"Reverse Active Energy:         {value:.2f} kWh" if value is not None else "Reverse Active Energy:         Failed to decode")
         
-        result = meter.read_data(meter.DI_REMAINING_ENERGY)
+        result = results[meter.DI_REMAINING_ENERGY]
         if result and result['data']:
             value = meter.decode_energy(result['data'])
             if value is not None:
@@ -342,13 +458,13 @@ def read_meter(port="/dev/ttyUSB0", address="AAAAAAAAAAAA"):
                 print("Remaining Energy (Prepaid):    Failed to decode")
         
         # Instantaneous Values
-        print("\n" + "="*80)
+        print("\n" + _BAR)
         print("INSTANTANEOUS VALUES")
-        print("="*80)
+        print(_BAR)
         
         # Voltage
         print("\n[VOLTAGE]")
-        result = meter.read_data(meter.DI_VOLTAGE)
+        result = results[meter.DI_VOLTAGE]
         if result and result['data']:
             print(f"Raw data bytes: {result['data'].hex()}")
             value = meter.decode_voltage(result['data'])
@@ -361,7 +477,7 @@ def read_meter(port="/dev/ttyUSB0", address="AAAAAAAAAAAA"):
         
         # Current
         print("\n[CURRENT]")
-        result = meter.read_data(meter.DI_CURRENT)
+        result = results[meter.DI_CURRENT]
         if result and result['data']:
             print(f"Raw data bytes: {result['data'].hex()}")
             value = meter.decode_current(result['data'])
@@ -374,7 +490,7 @@ def read_meter(port="/dev/ttyUSB0", address="AAAAAAAAAAAA"):
         
         # Active Power
         print("\n[ACTIVE POWER]")
-        result = meter.read_data(meter.DI_ACTIVE_POWER)
+        result = results[meter.DI_ACTIVE_POWER]
         if result and result['data']:
             print(f"Raw data bytes: {result['data'].hex()}")
             value = meter.decode_power(result['data'])
@@ -387,7 +503,7 @@ def read_meter(port="/dev/ttyUSB0", address="AAAAAAAAAAAA"):
         
         # Reactive Power
         print("\n[REACTIVE POWER]")
-        result = meter.read_data(meter.DI_REACTIVE_POWER)
+        result = results[meter.DI_REACTIVE_POWER]
         if result and result['data']:
             print(f"Raw data bytes: {result['data'].hex()}")
             value = meter.decode_power(result['data'])
@@ -398,7 +514,7 @@ def read_meter(port="/dev/ttyUSB0", address="AAAAAAAAAAAA"):
         
         # Frequency
         print("\n[FREQUENCY]")
-        result = meter.read_data(meter.DI_FREQUENCY)
+        result = results[meter.DI_FREQUENCY]
         if result and result['data']:
             print(f"Raw data bytes: {result['data'].hex()}")
             value = meter.decode_generic_bcd(result['data'], decimal_places=2)
@@ -409,7 +525,7 @@ def read_meter(port="/dev/ttyUSB0", address="AAAAAAAAAAAA"):
         
         # Power Factor
         print("\n[POWER FACTOR]")
-        result = meter.read_data(meter.DI_POWER_FACTOR)
+        result = results[meter.DI_POWER_FACTOR]
         if result and result['data']:
             print(f"Raw data bytes: {result['data'].hex()}")
             value = meter.decode_generic_bcd(result['data'], decimal_places=3)
@@ -418,11 +534,9 @@ def read_meter(port="/dev/ttyUSB0", address="AAAAAAAAAAAA"):
             else:
                 print("Failed to decode power factor")
         
-        meter.disconnect()
-        
-        print("\n" + "="*80)
+        print("\n" + _BAR)
         print("Reading complete")
-        print("="*80)
+        print(_BAR)
         
         return True
         
@@ -430,16 +544,17 @@ def read_meter(port="/dev/ttyUSB0", address="AAAAAAAAAAAA"):
         print(f"\nError: {e}")
         import traceback
         traceback.print_exc()
-        try:
-            meter.disconnect()
-        except:
-            pass
         return False
 
 
 if __name__ == "__main__":
-    port = sys.argv[1] if len(sys.argv) > 1 else "/dev/ttyUSB0"
-    address = sys.argv[2] if len(sys.argv) > 2 else "AAAAAAAAAAAA"
+    args = [arg for arg in sys.argv[1:] if arg != "--async"]
+    use_async = "--async" in sys.argv[1:]
+    port = args[0] if len(args) > 0 else "/dev/ttyUSB0"
+    address = args[1] if len(args) > 1 else "AAAAAAAAAAAA"
     
-    success = read_meter(port, address)
+    try:
+        success = read_meter(port, address, use_async=use_async)
+    finally:
+        close_ports()
     sys.exit(0 if success else 1)
\ No newline at end of file
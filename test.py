@@ -1,3 +1,4 @@
+import select
 import serial
 import time
 from gurux_dlms import GXDLMSClient, GXReplyData
@@ -9,7 +10,7 @@ from gurux_dlms import GXByteBuffer
 # Serial connection helper
 # -------------------------------
 class DLMSConnection:
-    def __init__(self, port, baudrate=9600, timeout=2):
+    def __init__(self, port, baudrate=9600, timeout=2, debug=False):
         self.ser = serial.Serial(
             port=port,
             baudrate=baudrate,
@@ -19,6 +20,10 @@ class DLMSConnection:
             timeout=timeout
         )
         self.current_baudrate = baudrate
+        # Hex dumps of every chunk sent/received, off unless troubleshooting
+        self.debug = debug
+        # Receive buffer reused for every response
+        self._rx = bytearray(4096)
 
     def iec_mode_init(self, initial_baud=300):
         """
@@ -104,24 +109,46 @@ class DLMSConnection:
 
     def read_complete_response(self, max_bytes=2048, timeout=2.0):
         """Read all available data from serial port"""
-        buffer = bytearray()
-        start_time = time.time()
+        max_bytes = min(max_bytes, len(self._rx))
+        n = 0
+        # POSIX ports expose their fd so reads can wait in select(); looked
+        # up per call because iec_mode_init reopens the port
+        try:
+            fd = self.ser.fileno()
+        except (AttributeError, OSError):
+            fd = None
+        deadline = time.monotonic() + timeout
         
-        # FIXED: Better timeout handling
-        while (time.time() - start_time) < timeout and len(buffer) < max_bytes:
-            if self.ser.in_waiting > 0:
-                chunk = self.ser.read(self.ser.in_waiting)
-                if chunk:
-                    buffer.extend(chunk)
+        # Block in select() until bytes arrive instead of polling in_waiting;
+        # the response is over once the line stays quiet for `timeout`
+        while n < max_bytes:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if fd is not None:
+                ready, _, _ = select.select([fd], [], [], remaining)
+                if not ready:
+                    break
+            
+            # Without an fd this read blocks for up to the port's timeout
+            chunk = self.ser.read(min(self.ser.in_waiting or 1, max_bytes - n))
+            if chunk:
+                self._rx[n:n + len(chunk)] = chunk
+                n += len(chunk)
+                if self.debug:
                     print(f"Read chunk ({len(chunk)} bytes): {chunk.hex()}")
-                    # Reset timeout on successful read
-                    start_time = time.time()
-            time.sleep(0.05)
+                # Reset timeout on successful read
+                deadline = time.monotonic() + timeout
+            elif fd is None:
+                break
         
-        if not buffer:
+        if not n:
             raise Exception("No response from meter")
         
-        print(f"Total response ({len(buffer)} bytes): {buffer.hex()}")
+        # Slicing a bytearray already copies
+        buffer = self._rx[:n]
+        if self.debug:
+            print(f"Total response ({n} bytes): {buffer.hex()}")
         return buffer
 
     def read_dlms_packet(self, client, reply):
@@ -155,7 +182,8 @@ class DLMSConnection:
     def write(self, data):
         self.ser.reset_output_buffer()
         self.ser.write(data)
-        print(f"Sent ({len(data)} bytes): {data.hex()}")
+        if self.debug:
+            print(f"Sent ({len(data)} bytes): {data.hex()}")
         time.sleep(0.1)  # FIXED: Small delay after write
 
     def close(self):
@@ -164,12 +192,26 @@ class DLMSConnection:
 
 
 # -------------------------------
-# Main communication function
+# Main communication functions
 # -------------------------------
-def communicate_with_meter(port, client_addr=16, server_addr=1):
+def iec_init_once(conn):
     """
-    Communicate with DLMS meter
-    FIXED: Simplified with correct default addresses
+    Run the IEC 62056-21 handshake on an open connection
+    Does not depend on DLMS addresses, so one handshake serves every try_dlms
+    """
+    if not conn.iec_mode_init():
+        return False
+    print("✓ IEC initialization successful\n")
+    
+    # FIXED: Add delay before SNRM
+    time.sleep(0.5)
+    return True
+
+
+def try_dlms(conn, client_addr=16, server_addr=1):
+    """
+    Run one SNRM/AARQ/read/release session on an IEC-initialized connection
+    Leaves the serial port open, so another address pair can be tried on it
     """
     print("\n" + "="*70)
     print(f"DLMS Meter Communication - DDSY5558")
@@ -195,25 +237,16 @@ def communicate_with_meter(port, client_addr=16, server_addr=1):
     print(f"  Server Address: {client.serverAddress}")
     print(f"  Authentication: {client.authentication}")
     
-    # Open connection
-    conn = None
-    
     try:
-        conn = DLMSConnection(port, 9600)
         reply = GXReplyData()
         
-        # IEC mode initialization
-        if not conn.iec_mode_init():
-            raise Exception("IEC initialization failed")
-        print("✓ IEC initialization successful\n")
-        
-        # FIXED: Add delay before SNRM
-        time.sleep(0.5)
-        
         # Step 1: SNRM
         print("\n" + "="*70)
         print("Step 1: SNRM Request (Set Normal Response Mode)")
         print("="*70)
+        # Drop the UA/DM answer to a previous attempt's disconnect, which
+        # would otherwise be read back glued in front of this UA
+        conn.ser.reset_input_buffer()
         snrm = client.snrmRequest()
         print(f"SNRM command ({len(snrm)} bytes): {snrm.hex()}")
         conn.write(snrm)
@@ -295,8 +328,6 @@ def communicate_with_meter(port, client_addr=16, server_addr=1):
         except Exception as e:
             print(f"Disconnect error (non-critical): {e}")
         
-        if conn:
-            conn.close()
         print("\n✓ Session completed successfully")
         return True
         
@@ -304,12 +335,40 @@ def communicate_with_meter(port, client_addr=16, server_addr=1):
         print(f"\n✗ Communication failed: {e}")
         import traceback
         traceback.print_exc()
+        # Drop any half-open HDLC link so the next address pair starts clean
+        try:
+            conn.write(client.disconnectRequest())
+        except:
+            pass
+        return False
+
+
+def communicate_with_meter(port, client_addr=16, server_addr=1, debug=False):
+    """
+    Communicate with DLMS meter
+    FIXED: Simplified with correct default addresses
+    """
+    conn = None
+    
+    try:
+        conn = DLMSConnection(port, 9600, debug=debug)
+        
+        # IEC mode initialization
+        if not iec_init_once(conn):
+            raise Exception("IEC initialization failed")
+        
+        return try_dlms(conn, client_addr, server_addr)
+        
+    except Exception as e:
+        print(f"\n✗ Communication failed: {e}")
+        return False
+    
+    finally:
         if conn:
             try:
                 conn.close()
             except:
                 pass
-        return False
 
 
 # -------------------------------
@@ -332,23 +391,36 @@ if __name__ == "__main__":
         (32, 1, "Management client 32, server 1"),
     ]
     
-    for client_addr, server_addr, desc in configs:
-        print(f"\n\nTrying: {desc}")
-        print("-" * 70)
-        success = communicate_with_meter(port, client_addr, server_addr)
-        if success:
+    # IEC handshake once; only the DLMS session is redone per address pair
+    conn = None
+    try:
+        conn = DLMSConnection(port, 9600)
+        if not iec_init_once(conn):
+            print("\n✗ IEC initialization failed")
+            configs = []
+        
+        for client_addr, server_addr, desc in configs:
+            print(f"\n\nTrying: {desc}")
+            print("-" * 70)
+            success = try_dlms(conn, client_addr, server_addr)
+            if success:
+                print("\n" + "="*70)
+                print(f"✓✓✓ SUCCESS with {desc} ✓✓✓")
+                print("="*70)
+                break
+            time.sleep(0.3)
+        else:
             print("\n" + "="*70)
-            print(f"✓✓✓ SUCCESS with {desc} ✓✓✓")
+            print("All configurations failed")
+            print("\nTroubleshooting steps:")
+            print("1. Verify physical connection (optical probe or RS485)")
+            print("2. Check if meter is powered on")
+            print("3. Try different serial port")
+            print("4. Check if meter is in DLMS mode (not just STS)")
+            print("5. Verify authentication password (default: 00000000)")
             print("="*70)
-            break
-        time.sleep(2)
-    else:
-        print("\n" + "="*70)
-        print("All configurations failed")
-        print("\nTroubleshooting steps:")
-        print("1. Verify physical connection (optical probe or RS485)")
-        print("2. Check if meter is powered on")
-        print("3. Try different serial port")
-        print("4. Check if meter is in DLMS mode (not just STS)")
-        print("5. Verify authentication password (default: 00000000)")
-        print("="*70)
+    except serial.SerialException as e:
+        print(f"\n✗ Communication failed: {e}")
+    finally:
+        if conn is not None:
+            conn.close()